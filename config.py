@@ -11,6 +11,16 @@ VIDEO_WIDTH = 480
 VIDEO_HEIGHT = 800
 JPEG_QUALITY = 1  # 1 = максимальное качество
 
+# Аппаратное кодирование JPEG (если пробный кадр не кодируется или экспорт на нем упал - используется CPU)
+USE_HW_ENCODER = True
+HW_JPEG_ENCODERS = ('mjpeg_qsv',)  # Intel Quick Sync
+JPEG_QSV_QUALITY = 100  # 1-100, 100 = максимальное качество
+
+# Параллельный экспорт: видео делится на части по времени
+EXPORT_WORKERS = None  # Процессов ffmpeg (None = по числу ядер, но не больше EXPORT_MAX_WORKERS)
+EXPORT_MAX_WORKERS = 4  # Больше процессов не ускоряет: каждый и так многопоточный
+EXPORT_MIN_CHUNK_DURATION = 2.0  # Минимальная длительность части (секунды)
+
 # Fade эффекты
 FADE_DURATION = 1.0  # секунды
 
@@ -19,6 +29,8 @@ DEFAULT_OUTPUT_DIR = "export/part0"
 DEFAULT_REMOTE_DIR = "/etc/boot-display"
 
 # Boot display конфигурация
+BOOT_CONFIG_NAME = "boot-display.conf"
+FRAME_PATTERN = "pic_%03d.jpg"
 BOOT_CONFIG_TEMPLATE = """width: {width}
 height: {height}
 fps: {fps}
@@ -35,3 +47,11 @@ VIDEO_FILE_TYPES = [
 # SSH настройки
 DEFAULT_SSH_PORT = 22
 SSH_TIMEOUT = 10
+SSH_SOCKET_BUFFER_SIZE = 32 * 1024 * 1024  # Буферы сокета (SO_SNDBUF/SO_RCVBUF)
+SSH_WINDOW_SIZE = 2147483647  # Максимальное окно SSH канала
+SFTP_CHUNK_SIZE = 32768  # Размер блока записи SFTP
+UPLOAD_WORKERS = 8  # Параллельных загрузок файлов
+USE_OPENSSH = False  # Загружать через системные ssh/tar (нужна авторизация по ключу, пароль не используется)
+
+# Размер буфера потокового копирования файлов
+COPY_BUFFER_SIZE = 1 << 20  # 1 MB
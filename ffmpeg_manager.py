@@ -1,11 +1,45 @@
 """Модуль для управления FFmpeg: поиск, загрузка и установка."""
 
+import io
 import os
 import sys
+import shutil
 import zipfile
-import urllib.request
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
-from config import FFMPEG_DOWNLOAD_URL, FFMPEG_ARCHIVE_BIN_PATH
+from config import FFMPEG_DOWNLOAD_URL, FFMPEG_ARCHIVE_BIN_PATH, COPY_BUFFER_SIZE
+
+# Общий пул HTTP соединений модуля
+_http = urllib3.PoolManager()
+
+
+def _extract_member(archive: bytes, name: str, target_dir: str) -> None:
+    """
+    Распаковывает один файл архива в директорию (без структуры папок).
+    
+    Каждый вызов открывает собственный ZipFile: один объект ZipFile
+    нельзя безопасно читать из нескольких потоков.
+    
+    Args:
+        archive: Содержимое zip архива
+        name: Имя файла внутри архива
+        target_dir: Директория назначения
+    """
+    target_path = os.path.join(target_dir, os.path.basename(name))
+    with zipfile.ZipFile(io.BytesIO(archive), 'r') as zip_ref:
+        info = zip_ref.getinfo(name)
+        with open(target_path, 'wb', buffering=COPY_BUFFER_SIZE) as target:
+            # Резервируем место под файл заранее одной операцией
+            if info.file_size:
+                if hasattr(os, 'posix_fallocate'):
+                    os.posix_fallocate(target.fileno(), 0, info.file_size)
+                else:
+                    target.truncate(info.file_size)
+            
+            # Копируем блоками по 1 MB, не распаковывая файл в память целиком
+            with zip_ref.open(info) as source:
+                shutil.copyfileobj(source, target, COPY_BUFFER_SIZE)
 
 
 def download_ffmpeg(script_dir: str) -> str | None:
@@ -21,48 +55,47 @@ def download_ffmpeg(script_dir: str) -> str | None:
     print("⚠ Для раскадровки необходим FFmpeg, который не найден в системе. Загрузка...")
     print(f"📥 Источник: {FFMPEG_DOWNLOAD_URL}")
     
-    zip_path = os.path.join(script_dir, "ffmpeg.zip")
     ffmpeg_exe = os.path.join(script_dir, "ffmpeg.exe")
     
     try:
-        # Скачиваем FFmpeg с прогресс-баром
+        # Скачиваем FFmpeg в память с прогресс-баром (без временного zip на диске)
         print("\nЗагрузка FFmpeg (~80 MB)...")
         
-        class DownloadProgressBar(tqdm):
-            def update_to(self, b=1, bsize=1, tsize=None):
-                if tsize is not None:
-                    self.total = tsize
-                self.update(b * bsize - self.n)
-        
-        with DownloadProgressBar(unit='B', unit_scale=True, miniters=1, desc='FFmpeg') as t:
-            urllib.request.urlretrieve(FFMPEG_DOWNLOAD_URL, zip_path, reporthook=t.update_to)
+        chunks = []
+        response = _http.request('GET', FFMPEG_DOWNLOAD_URL, preload_content=False)
+        try:
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            total = int(response.headers.get('Content-Length', 0)) or None
+            # Прогресс-бар обновляется раз на блок 1 MB
+            with tqdm(total=total, unit='B', unit_scale=True, desc='FFmpeg') as t:
+                for chunk in response.stream(COPY_BUFFER_SIZE):
+                    chunks.append(chunk)
+                    t.update(len(chunk))
+        finally:
+            response.release_conn()
+        # Блоки склеиваются в архив, после del в памяти остается только он (без второй копии)
+        archive = b''.join(chunks)
+        del chunks
         
         # Распаковываем с прогресс-баром
         print("\nРаспаковка...")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with zipfile.ZipFile(io.BytesIO(archive), 'r') as zip_ref:
             # Получаем список файлов для распаковки
             files_to_extract = [f for f in zip_ref.namelist() 
                               if FFMPEG_ARCHIVE_BIN_PATH in f and not f.endswith('/')]
-            
-            # Распаковываем с прогресс-баром
-            with tqdm(total=len(files_to_extract), desc='Распаковка', unit='файл') as pbar:
-                for file in files_to_extract:
-                    filename = os.path.basename(file)
-                    target_path = os.path.join(script_dir, filename)
-                    with zip_ref.open(file) as source:
-                        with open(target_path, 'wb') as target:
-                            target.write(source.read())
-                    pbar.update(1)
         
-        # Удаляем архив
-        os.remove(zip_path)
+        # Распаковываем параллельно (zlib отпускает GIL) с прогресс-баром
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(lambda name: _extract_member(archive, name, script_dir), files_to_extract)
+            for _ in tqdm(results, total=len(files_to_extract), desc='Распаковка', unit='файл'):
+                pass
+        
         print("✓ FFmpeg успешно установлен (ffmpeg.exe и все необходимые DLL)!")
         return ffmpeg_exe
         
     except Exception as e:
         print(f"✗ Ошибка загрузки FFmpeg: {e}")
-        if os.path.exists(zip_path):
-            os.remove(zip_path)
         return None
 
 
@@ -74,7 +107,6 @@ def find_ffmpeg() -> str | None:
         Путь к ffmpeg или None при ошибке
     """
     # Проверяем системный PATH
-    import shutil
     if shutil.which('ffmpeg'):
         return 'ffmpeg'
     
@@ -1,9 +1,101 @@
 """Модуль для загрузки файлов на принтер по SSH/SFTP."""
 
+import errno
+import io
 import os
+import queue
+import shlex
+import shutil
+import socket
+import subprocess
+import tarfile
+import threading
+import time
 import paramiko
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Iterable
 from tqdm import tqdm
+from config import SSH_SOCKET_BUFFER_SIZE, SSH_WINDOW_SIZE, SFTP_CHUNK_SIZE, UPLOAD_WORKERS, COPY_BUFFER_SIZE, FRAME_PATTERN, USE_OPENSSH
+
+
+class _ProgressWriter:
+    """Обертка над потоком записи, обновляющая прогресс-бар по записанным байтам."""
+    
+    def __init__(self, stream, pbar=None):
+        self.stream = stream
+        self.pbar = pbar
+    
+    def write(self, data: bytes) -> int:
+        self.stream.write(data)
+        if self.pbar:
+            self.pbar.update(len(data))
+        return len(data)
+
+
+def _root_owned(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    """
+    Фильтр tar: файлы на принтере должны принадлежать root, а не локальному пользователю.
+    
+    Права тоже задаются явно, как в stream_frames_via_tar: локальные права
+    (в Windows это всегда 0o777/0o666) tar на принтере восстановил бы как есть.
+    
+    Args:
+        info: Заголовок файла в архиве
+        
+    Returns:
+        Заголовок с владельцем root:root и правами 0o755 (папки) или 0o644 (файлы)
+    """
+    info.uid = info.gid = 0
+    info.uname = info.gname = 'root'
+    info.mode = 0o755 if info.isdir() else 0o644
+    return info
+
+
+def _scan_directory(local_dir: str) -> tuple[list[str], list[tuple[str, str, int]]]:
+    """
+    Обходит директорию один раз и собирает папки и файлы для загрузки.
+    
+    Args:
+        local_dir: Локальная директория
+        
+    Returns:
+        Кортеж (относительные пути папок - родитель раньше вложенных,
+        список файлов (локальный путь, относительный путь, размер))
+    """
+    dirs = []
+    files = []
+    pending = [(local_dir, '')]
+    while pending:
+        path, rel_prefix = pending.pop()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                rel_path = f'{rel_prefix}{entry.name}'
+                if entry.is_dir():
+                    dirs.append(rel_path)
+                    pending.append((entry.path, f'{rel_path}/'))
+                else:
+                    files.append((entry.path, rel_path, entry.stat().st_size))
+    return dirs, files
+
+
+def _estimate_tar_size(dirs: list[str], files: list[tuple[str, str, int]]) -> int:
+    """
+    Оценивает размер tar-потока для директории (без сжатия).
+    
+    Args:
+        dirs: Относительные пути папок
+        files: Файлы (локальный путь, относительный путь, размер)
+        
+    Returns:
+        Размер потока в байтах
+    """
+    block = tarfile.BLOCKSIZE
+    size = block * len(dirs)  # Заголовки вложенных папок
+    for _, _, file_size in files:
+        size += block + -(-file_size // block) * block
+    size += 2 * block  # Завершающие нулевые блоки
+    return -(-size // tarfile.RECORDSIZE) * tarfile.RECORDSIZE
 
 
 class PrinterUploader:
@@ -12,6 +104,7 @@ class PrinterUploader:
     def __init__(self):
         self.ssh = None
         self.sftp = None
+        self.openssh = None
     
     def connect(self, ip: str, port: int, user: str, password: str, timeout: int = 10):
         """
@@ -27,14 +120,43 @@ class PrinterUploader:
         Raises:
             Exception: При ошибке подключения
         """
+        # Сокет с увеличенными буферами (поддерживает и IPv4, и IPv6 адреса)
+        sock = socket.create_connection((ip, port), timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SSH_SOCKET_BUFFER_SIZE)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SSH_SOCKET_BUFFER_SIZE)
+        except Exception:
+            sock.close()
+            raise
+        
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        self.ssh.connect(ip, port=port, username=user, password=password, timeout=timeout)
+        self.ssh.connect(ip, port=port, username=user, password=password, timeout=timeout, sock=sock)
+        
+        # Большое окно для всех последующих каналов и редкий rekey
+        transport = self.ssh.get_transport()
+        transport.default_window_size = SSH_WINDOW_SIZE # pyright: ignore[reportOptionalMemberAccess]
+        transport.packetizer.REKEY_BYTES = pow(2, 40) # pyright: ignore[reportOptionalMemberAccess]
+        transport.packetizer.REKEY_PACKETS = pow(2, 40) # pyright: ignore[reportOptionalMemberAccess]
+        
+        # Системные ssh и tar (если есть) берут на себя архивацию и шифрование
+        ssh_binary = shutil.which('ssh')
+        tar_binary = shutil.which('tar')
+        if USE_OPENSSH and ssh_binary and tar_binary:
+            self.openssh = {
+                'ssh': ssh_binary,
+                'tar': tar_binary,
+                'target': f'{user}@{ip}',
+                'port': port,
+                'timeout': timeout
+            }
         
         # Пробуем подключить SFTP
         try:
-            # ОТЛАДКА: Раскомментируйте для теста fallback на SCP
-            #raise Exception("SFTP not available")
+            # ОТЛАДКА: задайте переменную окружения FORCE_SCP для теста fallback на SCP
+            if os.environ.get('FORCE_SCP'):
+                raise Exception("SFTP not available")
             self.sftp = self.ssh.open_sftp()
         except Exception as e:
             print(f"⚠ SFTP недоступен (голый root без entwares) ({e}), используется fallback на SCP")
@@ -55,18 +177,55 @@ class PrinterUploader:
         
         Args:
             remote_dir: Путь к директории на принтере
+            
+        Raises:
+            Exception: Если переименование или создание директории не удалось
+        """
+        # Генерируем уникальную метку времени
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        # Переименовываем текущую папку в backup и создаем новую одной командой
+        target = shlex.quote(remote_dir)
+        backup = shlex.quote(f'{remote_dir}-BACK-{timestamp}')
+        prepare_cmd = f'if [ -d {target} ]; then mv {target} {backup} || exit 1; fi; mkdir -p {target}'
+        stdin, stdout, stderr = self.ssh.exec_command(prepare_cmd) # pyright: ignore[reportOptionalMemberAccess]
+        exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            error = stderr.read().decode('utf-8', errors='ignore')
+            raise Exception(f"Ошибка создания backup {remote_dir}: {error}")
+    
+    def replace_directory(self, staging_dir: str, remote_dir: str):
+        """
+        Заменяет директорию на принтере заранее загруженной, сохраняя backup текущей.
+        
+        Args:
+            staging_dir: Временная директория с новым содержимым
+            remote_dir: Путь к директории на принтере
+            
+        Raises:
+            Exception: Если переименование не удалось
         """
         # Генерируем уникальную метку времени
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Переименовываем текущую папку в backup с временной меткой
-        backup_cmd = f'if [ -d {remote_dir} ]; then mv {remote_dir} {remote_dir}-BACK-{timestamp}; fi'
-        stdin, stdout, stderr = self.ssh.exec_command(backup_cmd) # pyright: ignore[reportOptionalMemberAccess]
-        stdout.read()
+        target = shlex.quote(remote_dir)
+        backup = shlex.quote(f'{remote_dir}-BACK-{timestamp}')
+        cmd = f'if [ -d {target} ]; then mv {target} {backup} || exit 1; fi; mv {shlex.quote(staging_dir)} {target}'
+        stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
+        exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            error = stderr.read().decode('utf-8', errors='ignore')
+            raise Exception(f"Ошибка замены {remote_dir}: {error}")
+    
+    def remove_directory(self, remote_dir: str):
+        """
+        Удаляет директорию на принтере (если она есть).
         
-        # Создаем новую папку
-        stdin, stdout, stderr = self.ssh.exec_command(f'mkdir -p {remote_dir}') # pyright: ignore[reportOptionalMemberAccess]
-        stdout.read()
+        Args:
+            remote_dir: Путь к директории на принтере
+        """
+        stdin, stdout, stderr = self.ssh.exec_command(f'rm -rf {shlex.quote(remote_dir)}') # pyright: ignore[reportOptionalMemberAccess]
+        stdout.channel.recv_exit_status()
     
     def upload_file_scp(self, local_path: str, remote_path: str):
         """
@@ -76,17 +235,16 @@ class PrinterUploader:
             local_path: Локальный путь к файлу
             remote_path: Удаленный путь на принтере
         """
-        with open(local_path, 'rb') as f:
-            file_data = f.read()
-        
         # Экранируем путь для безопасности
         remote_path_escaped = remote_path.replace("'", "'\\''")
         
-        # Загружаем через cat команду
+        # Загружаем через cat команду потоково, не читая файл в память целиком
         cmd = f"cat > '{remote_path_escaped}'"
-        stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
-        stdin.write(file_data) # pyright: ignore[reportOptionalMemberAccess]
-        stdin.close() # pyright: ignore[reportOptionalMemberAccess]
+        with open(local_path, 'rb', buffering=COPY_BUFFER_SIZE) as f:
+            stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
+            shutil.copyfileobj(f, stdin, COPY_BUFFER_SIZE)
+            stdin.flush()
+            stdin.channel.shutdown_write()
         
         # Ждем завершения
         exit_code = stdout.channel.recv_exit_status()
@@ -94,84 +252,439 @@ class PrinterUploader:
             error = stderr.read().decode('utf-8', errors='ignore')
             raise Exception(f"Ошибка загрузки {remote_path}: {error}")
     
-    def upload_directory(self, local_dir: str, remote_dir: str, pbar=None) -> list[str]:
+    def upload_file_sftp(self, sftp: paramiko.SFTPClient, local_path: str, remote_path: str):
+        """
+        Загружает файл через SFTP с конвейерной записью.
+        
+        Args:
+            sftp: SFTP клиент
+            local_path: Локальный путь к файлу
+            remote_path: Удаленный путь на принтере
+        """
+        # Конвейерная запись: не ждем подтверждения каждого блока
+        with open(local_path, 'rb') as f, sftp.file(remote_path, 'wb') as remote_file:
+            remote_file.set_pipelined(True)
+            shutil.copyfileobj(f, remote_file, SFTP_CHUNK_SIZE)
+    
+    def make_remote_dirs(self, remote_dirs: list[str]):
         """
-        Рекурсивно загружает директорию на принтер.
+        Создает папки на принтере одной SSH командой.
+        
+        Args:
+            remote_dirs: Удаленные пути папок
+            
+        Raises:
+            Exception: Если mkdir завершился с ошибкой
+        """
+        if not remote_dirs:
+            return
+        
+        cmd = 'mkdir -p ' + ' '.join(shlex.quote(path) for path in sorted(set(remote_dirs)))
+        stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
+        exit_code = stdout.channel.recv_exit_status()
+        if exit_code != 0:
+            error = stderr.read().decode('utf-8', errors='ignore')
+            raise Exception(f"Ошибка создания папок: {error}")
+    
+    def upload_directory(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        pbar=None,
+        workers: int = UPLOAD_WORKERS,
+        scan: tuple[list[str], list[tuple[str, str, int]]] | None = None
+    ) -> list[str]:
+        """
+        Рекурсивно загружает директорию на принтер в несколько потоков.
         
         Args:
             local_dir: Локальная директория
             remote_dir: Удаленная директория на принтере
             pbar: Прогресс-бар (опционально)
+            workers: Количество параллельных загрузок
+            scan: Готовый результат обхода local_dir (опционально)
             
         Returns:
             Список загруженных файлов и папок
         """
+        dirs, files = scan or _scan_directory(local_dir)
         uploaded = []
         
-        for item in os.listdir(local_dir):
-            local_path = os.path.join(local_dir, item)
-            remote_path = f'{remote_dir}/{item}'
-            
-            if os.path.isdir(local_path):
-                # Создаем папку на удаленном сервере
-                if self.sftp:
-                    try:
-                        self.sftp.mkdir(remote_path)
-                    except IOError:
-                        pass  # Папка уже существует
-                else:
-                    # Через SSH команду
-                    self.ssh.exec_command(f"mkdir -p '{remote_path.replace(chr(39), chr(39)+chr(92)+chr(39)+chr(39))}'") # pyright: ignore[reportOptionalMemberAccess]
-                
-                # Рекурсивно загружаем содержимое
-                uploaded.extend(self.upload_directory(local_path, remote_path, pbar))
-                uploaded.append(f"{item}/ (папка)")
-            else:
-                # Загружаем файл
-                if self.sftp:
-                    self.sftp.put(local_path, remote_path)
-                else:
-                    self.upload_file_scp(local_path, remote_path)
-                uploaded.append(item)
-                
-                # Обновляем прогресс-бар
-                if pbar:
+        # Создаем все папки одной командой до загрузки файлов
+        self.make_remote_dirs([f'{remote_dir}/{rel_path}' for rel_path in dirs])
+        uploaded.extend(f"{os.path.basename(rel_path)}/ (папка)" for rel_path in dirs)
+        
+        transfers = [(local_path, f'{remote_dir}/{rel_path}') for local_path, rel_path, _ in files]
+        
+        if not transfers:
+            return uploaded
+        
+        workers = max(1, min(workers, len(transfers)))
+        
+        pbar_lock = threading.Lock()
+        
+        def report(item: str):
+            # Обновляем прогресс-бар
+            if pbar:
+                with pbar_lock:
                     pbar.update(1)
                     pbar.set_postfix_str(f"{item[:30]}...")
         
+        if not self.sftp:
+            # Каждый поток загружает файлы своей командой cat: конец файла
+            # определяется закрытием stdin, а не разбором потока на принтере
+            def upload_scp(transfer: tuple[str, str]) -> str:
+                local_path, remote_path = transfer
+                item = os.path.basename(local_path)
+                self.upload_file_scp(local_path, remote_path)
+                report(item)
+                return item
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                uploaded.extend(executor.map(upload_scp, transfers))
+            return uploaded
+        
+        # Пул SFTP клиентов: каждый поток берет свободный канал и возвращает его
+        sftp_pool = queue.Queue()
+        sftp_pool.put(self.sftp)
+        extra_clients = []
+        
+        def upload(transfer: tuple[str, str]) -> str:
+            local_path, remote_path = transfer
+            item = os.path.basename(local_path)
+            
+            sftp = sftp_pool.get()
+            try:
+                self.upload_file_sftp(sftp, local_path, remote_path)
+            finally:
+                sftp_pool.put(sftp)
+            
+            report(item)
+            return item
+        
+        try:
+            for _ in range(workers - 1):
+                client = self.ssh.open_sftp() # pyright: ignore[reportOptionalMemberAccess]
+                extra_clients.append(client)
+                sftp_pool.put(client)
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                uploaded.extend(executor.map(upload, transfers))
+        finally:
+            for client in extra_clients:
+                client.close()
+        
         return uploaded
     
-    def upload_export_to_printer(self, export_dir: str, remote_dir: str = '/etc/boot-display') -> tuple[bool, str, list[str]]:
+    def upload_via_openssh(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        pbar=None,
+        scan: tuple[list[str], list[tuple[str, str, int]]] | None = None
+    ) -> list[str]:
         """
-        Загружает содержимое export директории на принтер.
+        Загружает директорию конвейером системных tar и ssh.
+        
+        Архив создает и шифрует не Python, а системные утилиты; Python только
+        перекладывает поток из tar в ssh крупными блоками и обновляет прогресс.
+        Работает только с авторизацией по ключу (BatchMode), пароль системному
+        ssh не передается.
         
         Args:
-            export_dir: Локальная директория с экспортом
+            local_dir: Локальная директория
             remote_dir: Удаленная директория на принтере
+            pbar: Прогресс-бар в байтах (опционально)
+            scan: Готовый результат обхода local_dir (опционально)
             
         Returns:
-            Кортеж (success, message, uploaded_files)
+            Список загруженных файлов
+            
+        Raises:
+            RuntimeError: Если OpenSSH недоступен или загрузка не удалась
         """
+        if not self.openssh:
+            raise RuntimeError("Системные ssh/tar не найдены")
+        
+        dirs, files = scan or _scan_directory(local_dir)
+        
+        # Передаем содержимое папки без корневой записи '.', чтобы не менять права remote_dir
+        top_level = [f'./{rel_path}' for rel_path in dirs if '/' not in rel_path]
+        top_level += [f'./{rel_path}' for _, rel_path, _ in files if '/' not in rel_path]
+        if not top_level:
+            return []
+        
+        # Как и AutoAddPolicy в paramiko: ключ хоста принимается без проверки
+        # и не записывается в known_hosts пользователя
+        options = [
+            '-o', 'BatchMode=yes',
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', f'UserKnownHostsFile={os.devnull}',
+            '-o', 'LogLevel=ERROR',
+            '-o', f"ConnectTimeout={self.openssh['timeout']}",
+            '-p', str(self.openssh['port'])
+        ]
+        
+        # Системный tar записывает локальные uid/gid и права: владельца не восстанавливаем (-o),
+        # а права приводим к 755 для папок и 644 для файлов, как в bulk_upload_via_tar
+        target = shlex.quote(remote_dir)
+        remote_cmd = (
+            f"mkdir -p {target} && cd {target} && tar -xof - && "
+            f"chmod -R u=rwX,go=rX {' '.join(shlex.quote(name) for name in top_level)}"
+        )
+        
+        tar_proc = subprocess.Popen(
+            [self.openssh['tar'], '--format=ustar', '-cf', '-', '-C', local_dir, *top_level],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        ssh_proc = subprocess.Popen(
+            [self.openssh['ssh'], *options, self.openssh['target'], remote_cmd],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        
         try:
-            if not os.path.exists(export_dir):
-                return False, f"Папка {export_dir} не найдена. Сначала выполните экспорт.", []
+            try:
+                with tar_proc.stdout, ssh_proc.stdin: # pyright: ignore[reportOptionalMemberAccess]
+                    while chunk := tar_proc.stdout.read1(COPY_BUFFER_SIZE): # pyright: ignore[reportOptionalMemberAccess]
+                        ssh_proc.stdin.write(chunk) # pyright: ignore[reportOptionalMemberAccess]
+                        if pbar:
+                            pbar.update(len(chunk))
+            except OSError as e:
+                # ssh завершился раньше времени, причина будет в stderr.
+                # В Windows запись в закрытый pipe дает EINVAL, а не BrokenPipeError
+                if not isinstance(e, BrokenPipeError) and e.errno != errno.EINVAL:
+                    raise
+                tar_proc.kill()
             
-            # Создаем backup и готовим директорию
-            self.backup_and_prepare_directory(remote_dir)
+            error = ssh_proc.stderr.read() # pyright: ignore[reportOptionalMemberAccess]
+            ssh_code = ssh_proc.wait()
+            tar_code = tar_proc.wait()
+        finally:
+            # При любой ошибке не оставляем запущенных процессов
+            for proc in (tar_proc, ssh_proc):
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            ssh_proc.stderr.close() # pyright: ignore[reportOptionalMemberAccess]
+        
+        if ssh_code != 0 or tar_code != 0:
+            raise RuntimeError(f"Ошибка загрузки через OpenSSH: {error.decode('utf-8', errors='ignore').strip()}")
+        
+        return [rel_path for _, rel_path, _ in files]
+    
+    def bulk_upload_via_tar(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        pbar=None,
+        scan: tuple[list[str], list[tuple[str, str, int]]] | None = None
+    ) -> list[str]:
+        """
+        Загружает директорию одним tar-потоком через SSH.
+        
+        Вместо отдельной команды на каждый файл открывается один канал,
+        в stdin которого пишется tar-архив, а удаленный tar распаковывает его.
+        
+        Args:
+            local_dir: Локальная директория
+            remote_dir: Удаленная директория на принтере
+            pbar: Прогресс-бар в байтах (опционально)
+            scan: Готовый результат обхода local_dir (опционально)
+            
+        Returns:
+            Список загруженных файлов
+            
+        Raises:
+            Exception: Если удаленный tar завершился с ошибкой
+        """
+        dirs, files = scan or _scan_directory(local_dir)
+        
+        remote_dir_escaped = remote_dir.replace("'", "'\\''")
+        cmd = f"mkdir -p '{remote_dir_escaped}' && tar -xof - -C '{remote_dir_escaped}'"
+        stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
+        
+        try:
+            # Потоковый режим без сжатия: JPEG уже сжаты.
+            # GNU формат без PAX-заголовков понимает и busybox tar на принтере
+            with tarfile.open(fileobj=_ProgressWriter(stdin, pbar), mode='w|', format=tarfile.GNU_FORMAT) as tar:
+                # Корневую папку '.' не добавляем, чтобы не менять права и время remote_dir
+                for rel_path in dirs:
+                    tar.add(os.path.join(local_dir, rel_path), arcname=f'./{rel_path}', recursive=False, filter=_root_owned)
+                for local_path, rel_path, _ in files:
+                    tar.add(local_path, arcname=f'./{rel_path}', recursive=False, filter=_root_owned)
+            stdin.flush()
+            stdin.channel.shutdown_write()
+            
+            exit_code = stdout.channel.recv_exit_status()
+            if exit_code != 0:
+                error = stderr.read().decode('utf-8', errors='ignore')
+                raise Exception(f"Ошибка распаковки tar в {remote_dir}: {error}")
+        finally:
+            stdin.channel.close()
+        
+        return [rel_path for _, rel_path, _ in files]
+    
+    def stream_frames_via_tar(
+        self,
+        frames: Iterable[bytes],
+        remote_dir: str,
+        extra_files: dict[str, bytes],
+        frames_dir: str = 'part0',
+        pbar=None
+    ) -> list[str]:
+        """
+        Загружает кадры на принтер одним tar-потоком по мере их получения.
+        
+        Кадры не сохраняются на локальный диск: каждый кадр сразу
+        добавляется в tar-архив, который распаковывает удаленный tar.
+        
+        Args:
+            frames: Итератор с содержимым JPEG кадров
+            remote_dir: Удаленная директория на принтере
+            extra_files: Дополнительные файлы в корне (имя -> содержимое)
+            frames_dir: Папка для кадров внутри remote_dir
+            pbar: Прогресс-бар в кадрах (опционально)
+            
+        Returns:
+            Список загруженных файлов
+            
+        Raises:
+            Exception: Если удаленный tar завершился с ошибкой
+        """
+        remote_dir_escaped = remote_dir.replace("'", "'\\''")
+        cmd = f"mkdir -p '{remote_dir_escaped}' && tar -xof - -C '{remote_dir_escaped}'"
+        stdin, stdout, stderr = self.ssh.exec_command(cmd) # pyright: ignore[reportOptionalMemberAccess]
+        
+        uploaded = []
+        mtime = int(time.time())
+        
+        def add_file(tar: tarfile.TarFile, name: str, data: bytes):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = mtime
+            tar.addfile(info, io.BytesIO(data))
+            uploaded.append(name)
+        
+        try:
+            with tarfile.open(fileobj=stdin, mode='w|', format=tarfile.GNU_FORMAT) as tar:
+                for name, data in extra_files.items():
+                    add_file(tar, name, data)
+                
+                folder = tarfile.TarInfo(frames_dir)
+                folder.type = tarfile.DIRTYPE
+                folder.mode = 0o755
+                folder.mtime = mtime
+                tar.addfile(folder)
+                
+                for index, frame in enumerate(frames):
+                    add_file(tar, f'{frames_dir}/{FRAME_PATTERN % index}', frame)
+                    if pbar:
+                        pbar.update(1)
+            stdin.flush()
+            stdin.channel.shutdown_write()
             
-            # Подсчитываем общее количество файлов для загрузки
-            total_files = sum([len(files) for _, _, files in os.walk(export_dir)])
+            exit_code = stdout.channel.recv_exit_status()
+            if exit_code != 0:
+                error = stderr.read().decode('utf-8', errors='ignore')
+                raise Exception(f"Ошибка распаковки tar в {remote_dir}: {error}")
+        finally:
+            # При ошибке закрытие канала завершает удаленный tar
+            stdin.channel.close()
+        
+        return uploaded
+    
+    def _upload_with_paramiko(
+        self,
+        export_dir: str,
+        remote_dir: str,
+        scan: tuple[list[str], list[tuple[str, str, int]]]
+    ) -> list[str]:
+        """
+        Загружает директорию через paramiko: tar-потоком, при ошибке - пофайлово.
+        
+        Args:
+            export_dir: Локальная директория с экспортом
+            remote_dir: Удаленная директория на принтере
+            scan: Результат обхода export_dir
+            
+        Returns:
+            Список загруженных файлов
+        """
+        dirs, files = scan
+        
+        # Загружаем одним tar-потоком с прогресс-баром в байтах
+        try:
+            with tqdm(
+                total=_estimate_tar_size(dirs, files),
+                desc='Загрузка на принтер',
+                unit='B',
+                unit_scale=True,
+                ncols=80,  # Фиксированная ширина прогресс-бара
+                mininterval=0.5,  # Минимальный интервал обновления (0.5 сек)
+                smoothing=0.1  # Сглаживание скорости
+            ) as pbar:
+                uploaded_files = self.bulk_upload_via_tar(export_dir, remote_dir, pbar, scan=scan)
+        except Exception as e:
+            print(f"⚠ Загрузка через tar не удалась ({e}), используется пофайловая загрузка")
             
             # Загружаем файлы с прогресс-баром
             with tqdm(
-                total=total_files, 
+                total=len(files), 
                 desc='Загрузка на принтер', 
                 unit='файл',
                 ncols=80,  # Фиксированная ширина прогресс-бара
                 mininterval=0.5,  # Минимальный интервал обновления (0.5 сек)
                 smoothing=0.1  # Сглаживание скорости
             ) as pbar:
-                uploaded_files = self.upload_directory(export_dir, remote_dir, pbar)
+                uploaded_files = self.upload_directory(export_dir, remote_dir, pbar, scan=scan)
+        
+        return uploaded_files
+    
+    def upload_export_to_printer(self, export_dir: str, remote_dir: str = '/etc/boot-display') -> tuple[bool, str, list[str]]:
+        """
+        Загружает содержимое export директории на принтер.
+        
+        Args:
+            export_dir: Локальная директория с экспортом
+            remote_dir: Удаленная директория на принтере
+            
+        Returns:
+            Кортеж (success, message, uploaded_files)
+        """
+        try:
+            if not os.path.exists(export_dir):
+                return False, f"Папка {export_dir} не найдена. Сначала выполните экспорт.", []
+            
+            # Создаем backup и готовим директорию
+            self.backup_and_prepare_directory(remote_dir)
+            
+            # Обходим папку один раз: результат нужен и для прогресс-бара, и для загрузки
+            scan = _scan_directory(export_dir)
+            
+            # Загружаем через системные tar и ssh (если включено), иначе через paramiko
+            uploaded_files = None
+            if self.openssh:
+                try:
+                    with tqdm(
+                        total=_estimate_tar_size(*scan),
+                        desc='Загрузка на принтер',
+                        unit='B',
+                        unit_scale=True,
+                        ncols=80,  # Фиксированная ширина прогресс-бара
+                        mininterval=0.5,  # Минимальный интервал обновления (0.5 сек)
+                        smoothing=0.1  # Сглаживание скорости
+                    ) as pbar:
+                        uploaded_files = self.upload_via_openssh(export_dir, remote_dir, pbar, scan=scan)
+                except Exception as e:
+                    # Например, ключ для авторизации не добавлен на принтер
+                    print(f"⚠ Загрузка через OpenSSH не удалась ({e}), используется paramiko")
+            
+            if uploaded_files is None:
+                uploaded_files = self._upload_with_paramiko(export_dir, remote_dir, scan)
             
             message = f"Успешно загружено {len(uploaded_files)} файлов"
             
@@ -3,21 +3,27 @@
 Использует tkinter для выбора файла и ffmpeg для экспорта
 """
 
+import os
 import sys
 import argparse
 import re
 import logging
 from tkinter import Tk, filedialog
 
-from config import VIDEO_FILE_TYPES, DEFAULT_SSH_PORT, DEFAULT_FPS
+from tqdm import tqdm
+
+from config import VIDEO_FILE_TYPES, DEFAULT_SSH_PORT, DEFAULT_FPS, DEFAULT_OUTPUT_DIR, BOOT_CONFIG_NAME
 from ffmpeg_manager import get_ffmpeg_path
-from video_processor import export_video
+from video_processor import export_video, stream_video_frames, build_boot_config
 from printer_uploader import PrinterUploader
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# Паттерн: username:password@ip:port или username:password@ip
+_CONNECTION_RE = re.compile(r'^([^:@]+):([^@]+)@([^:]+)(?::(\d+))?$')
+
 
 def select_video_file() -> str:
     """Открывает диалог выбора видео файла"""
@@ -48,9 +54,7 @@ def parse_connection_string(conn_str: str) -> dict[str, str | int]:
     Raises:
         ValueError: Если формат строки неверный
     """
-    # Паттерн: username:password@ip:port или username:password@ip
-    pattern = r'^([^:@]+):([^@]+)@([^:]+)(?::(\d+))?$'
-    match = re.match(pattern, conn_str)
+    match = _CONNECTION_RE.match(conn_str)
     
     if not match:
         raise ValueError(
@@ -118,6 +122,103 @@ def upload_to_printer(connection_string: str, export_dir: str = 'export', remote
         return False
 
 
+def export_and_upload(
+    connection_string: str,
+    video_path: str,
+    ffmpeg_cmd: str,
+    start_time: float = 0,
+    end_time: float | None = None,
+    fps: int = DEFAULT_FPS,
+    fade: bool = False,
+    scale_mode: str = 'stretch',
+    remote_dir: str = '/etc/boot-display'
+) -> bool:
+    """
+    Экспортирует видео сразу на принтер, минуя локальную папку export.
+    
+    Кадры из ffmpeg передаются на принтер по мере кодирования
+    одним tar-потоком по SSH во временную папку, которая заменяет
+    remote_dir (с backup) только после успешного экспорта.
+    
+    Args:
+        connection_string: Строка подключения username:password@ip:port
+        video_path: Путь к видео файлу
+        ffmpeg_cmd: Путь к ffmpeg
+        start_time: Время начала в секундах
+        end_time: Время конца в секундах (None = до конца видео)
+        fps: Кадров в секунду для экспорта
+        fade: Добавить fade in/out эффекты
+        scale_mode: Режим масштабирования ('stretch' или 'crop')
+        remote_dir: Удаленная директория на принтере
+        
+    Returns:
+        True при успехе, False при ошибке
+    """
+    uploader = PrinterUploader()
+    try:
+        # Парсим строку подключения
+        conn = parse_connection_string(connection_string)
+        
+        # Проверяем видео и рассчитываем экспорт до любых изменений на принтере
+        frame_count, frames = stream_video_frames(
+            video_path,
+            ffmpeg_cmd,
+            start_time=start_time,
+            end_time=end_time,
+            fps=fps,
+            fade=fade,
+            scale_mode=scale_mode
+        )
+        extra_files = {BOOT_CONFIG_NAME: build_boot_config(fps).encode('utf-8')}
+        
+        logger.info(f"\nПодключение к принтеру {conn['user']}@{conn['ip']}:{conn['port']}...")
+        uploader.connect(
+            ip=str(conn['ip']),
+            port=int(conn['port']),
+            user=str(conn['user']),
+            password=str(conn['password'])
+        )
+        
+        # Кадры распаковываются во временную папку: текущая заставка
+        # заменяется только после успешного завершения экспорта
+        staging_dir = f'{remote_dir}.tmp'
+        uploader.remove_directory(staging_dir)
+        try:
+            with tqdm(total=frame_count, desc='Экспорт на принтер', unit='кадр', ncols=80, mininterval=0.5) as pbar:
+                uploaded_files = uploader.stream_frames_via_tar(
+                    frames,
+                    staging_dir,
+                    extra_files,
+                    frames_dir=os.path.basename(DEFAULT_OUTPUT_DIR),
+                    pbar=pbar
+                )
+        except Exception:
+            # Если оборвалось соединение, очистка тоже упадет - показываем исходную ошибку
+            try:
+                uploader.remove_directory(staging_dir)
+            except Exception:
+                pass
+            raise
+        
+        # Создаем backup текущей папки и ставим новую на ее место
+        uploader.replace_directory(staging_dir, remote_dir)
+        
+        logger.info(f"✓ Успешно загружено {len(uploaded_files)} файлов в {remote_dir}")
+        return True
+        
+    except ValueError as e:
+        logger.error(f"✗ Ошибка: {e}")
+        return False
+    except RuntimeError as e:
+        logger.error(f"✗ {e}")
+        return False
+    except Exception as e:
+        logger.error(f"✗ Ошибка загрузки: {e}")
+        return False
+    finally:
+        uploader.close()
+
+
 def main() -> int:
     """Главная функция программы"""
     parser = argparse.ArgumentParser(description='Экспорт видео в раскадровку')
@@ -128,6 +229,7 @@ def main() -> int:
     parser.add_argument('--fade', action='store_true', help='Добавить fade in/out')
     parser.add_argument('--scale-mode', choices=['stretch', 'crop'], default='stretch', help='Режим масштабирования: stretch (растянуть) или crop (обрезать)')
     parser.add_argument('--upload', metavar='USER:PASS@IP:PORT', help='Загрузить на принтер (например: root:password@192.168.1.100:22)')
+    parser.add_argument('--stream', action='store_true', help='С --upload: передавать кадры на принтер сразу, без сохранения в папку export')
     
     args = parser.parse_args()
     
@@ -145,6 +247,20 @@ def main() -> int:
                 logger.info("Файл не выбран. Выход.")
                 return 1
         
+        # С --upload --stream кадры сразу передаются на принтер, без записи на диск
+        if args.upload and args.stream:
+            upload_success = export_and_upload(
+                args.upload,
+                video_path,
+                ffmpeg_cmd,
+                start_time=args.start,
+                end_time=args.end,
+                fps=args.fps,
+                fade=args.fade,
+                scale_mode=args.scale_mode
+            )
+            return 0 if upload_success else 1
+        
         # Экспортируем
         success = export_video(
             video_path,
@@ -1,19 +1,26 @@
 """Модуль для обработки видео: экспорт кадров и создание конфигурации."""
 
 import os
+import functools
 import subprocess
-import json
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
 from config import (
     DEFAULT_OUTPUT_DIR, VIDEO_WIDTH, VIDEO_HEIGHT,
-    JPEG_QUALITY, FADE_DURATION, BOOT_CONFIG_TEMPLATE
+    JPEG_QUALITY, FADE_DURATION, BOOT_CONFIG_TEMPLATE,
+    BOOT_CONFIG_NAME, FRAME_PATTERN, COPY_BUFFER_SIZE,
+    USE_HW_ENCODER, HW_JPEG_ENCODERS, JPEG_QSV_QUALITY,
+    EXPORT_WORKERS, EXPORT_MAX_WORKERS, EXPORT_MIN_CHUNK_DURATION
 )
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
+# Маркер конца JPEG изображения (End Of Image)
+JPEG_EOI = b'\xff\xd9'
+
 
 def get_video_duration(video_path: str, ffmpeg_cmd: str) -> float:
     """
@@ -29,23 +36,22 @@ def get_video_duration(video_path: str, ffmpeg_cmd: str) -> float:
     Raises:
         RuntimeError: Если не удалось определить длительность
     """
-    # Пытаемся использовать ffprobe с JSON выводом
+    # Пытаемся получить длительность одним вызовом ffprobe (только число в stdout)
     ffprobe_cmd = ffmpeg_cmd.replace('ffmpeg', 'ffprobe')
     
     try:
         cmd = [
             ffprobe_cmd,
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
+            '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=nw=1:nk=1',
             video_path
         ]
         result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return float(data['format']['duration'])
-    except:
+            return float(result.stdout.strip())
+    except (OSError, ValueError):
         pass
     
     # Fallback: парсим stderr ffmpeg
@@ -64,25 +70,206 @@ def get_video_duration(video_path: str, ffmpeg_cmd: str) -> float:
     raise RuntimeError("Не удалось определить длительность видео")
 
 
-def create_boot_config(output_dir: str, fps: int) -> None:
+def build_boot_config(fps: int) -> str:
     """
-    Создает конфигурационный файл boot-display.conf.
+    Формирует содержимое boot-display.conf.
     
     Args:
-        output_dir: Директория для экспорта (part0)
         fps: Кадров в секунду
+        
+    Returns:
+        Текст конфигурации
     """
-    export_base = os.path.dirname(output_dir)
-    config_path = os.path.join(export_base, 'boot-display.conf')
-    
-    config_content = BOOT_CONFIG_TEMPLATE.format(
+    return BOOT_CONFIG_TEMPLATE.format(
         width=VIDEO_WIDTH,
         height=VIDEO_HEIGHT,
         fps=fps
     )
+
+
+def create_boot_config(output_dir: str, fps: int) -> None:
+    """
+    Создает конфигурационный файл boot-display.conf.
+    
+    Args:
+        output_dir: Директория для экспорта (part0)
+        fps: Кадров в секунду
+    """
+    export_base = os.path.dirname(output_dir)
+    config_path = os.path.join(export_base, BOOT_CONFIG_NAME)
     
     with open(config_path, 'w') as f:
-        f.write(config_content)
+        f.write(build_boot_config(fps))
+
+
+@functools.lru_cache(maxsize=64)
+def _build_vf(scale_mode: str, fade_in: bool, fade_out_start: Optional[float]) -> str:
+    """
+    Формирует строку фильтров ffmpeg (кэшируется для повторных экспортов).
+    
+    Args:
+        scale_mode: Режим масштабирования ('stretch' или 'crop')
+        fade_in: Добавить fade in с начала
+        fade_out_start: Начало fade out в секундах (None = без fade out)
+        
+    Returns:
+        Значение для -vf
+    """
+    # Базовые фильтры: масштаб и поворот на 90° до 480x800
+    if scale_mode == 'crop':
+        # Обрезка с сохранением пропорций (заполняет весь кадр)
+        vf_filters = f'scale={VIDEO_HEIGHT}:{VIDEO_WIDTH}:force_original_aspect_ratio=increase,crop={VIDEO_HEIGHT}:{VIDEO_WIDTH},transpose=1'
+    else:
+        # Растяжение без сохранения пропорций (по умолчанию)
+        vf_filters = f'scale={VIDEO_HEIGHT}:{VIDEO_WIDTH},transpose=1'
+    
+    # Добавляем fade эффекты
+    if fade_in:
+        vf_filters += f',fade=t=in:st=0:d={FADE_DURATION}'
+    if fade_out_start is not None:
+        vf_filters += f',fade=t=out:st={fade_out_start:.3f}:d={FADE_DURATION}'
+    
+    return vf_filters
+
+
+def _prepare_export(
+    video_path: str,
+    ffmpeg_cmd: str,
+    start_time: float,
+    end_time: Optional[float],
+    fps: int,
+    fade: bool,
+    scale_mode: str,
+    chunks: int = 1
+) -> tuple[int, list[tuple[int, list[str]]]]:
+    """
+    Определяет диапазон экспорта и формирует аргументы ffmpeg до выходного файла.
+    
+    Диапазон может делиться на несколько частей для параллельного экспорта:
+    каждая часть начинается со своего кадра и получает свой -ss.
+    Fade in применяется только к первой части, fade out - только к последней,
+    поэтому части не короче длительности fade.
+    
+    Args:
+        video_path: Путь к видео файлу
+        ffmpeg_cmd: Путь к ffmpeg
+        start_time: Время начала в секундах
+        end_time: Время конца в секундах (None = до конца видео)
+        fps: Кадров в секунду для экспорта
+        fade: Добавить fade in/out эффекты
+        scale_mode: Режим масштабирования ('stretch' или 'crop')
+        chunks: Желаемое количество частей
+        
+    Returns:
+        Кортеж (общее количество кадров, список частей (номер первого кадра,
+        аргументы ffmpeg: вход, фильтры, частота, количество кадров))
+        
+    Raises:
+        RuntimeError: Если не удалось определить длительность
+    """
+    # Получаем длительность видео если end_time не указан
+    if end_time is None:
+        end_time = get_video_duration(video_path, ffmpeg_cmd)
+    
+    duration = end_time - start_time
+    # Вычитаем небольшой буфер (1 кадр) чтобы избежать чёрного кадра в конце
+    frame_count = int(duration * fps) - 1
+    
+    logger.info(f"Видео: {os.path.basename(video_path)}")
+    logger.info(f"Экспорт: {start_time:.2f}s - {end_time:.2f}s ({duration:.2f}s)")
+    logger.info(f"Кадров: {frame_count} ({fps} fps)")
+    logger.info(f"Fade: {'Включен' if fade else 'Выключен'}")
+    
+    fade_out_start = duration - FADE_DURATION - (2.0 / fps)
+    
+    # Части не короче минимальной длительности (и полного fade out)
+    min_chunk_frames = int(EXPORT_MIN_CHUNK_DURATION * fps)
+    if fade:
+        min_chunk_frames = max(min_chunk_frames, int((FADE_DURATION + 2.0 / fps) * fps) + 1)
+    chunks = max(1, min(chunks, frame_count // max(1, min_chunk_frames)))
+    
+    plan = []
+    for index in range(chunks):
+        # Кадры делятся поровну (разница между частями не больше 1 кадра)
+        first_frame = index * frame_count // chunks
+        chunk_frames = (index + 1) * frame_count // chunks - first_frame
+        offset = first_frame / fps
+        
+        # Fade эффекты: время отсчитывается от начала части
+        vf_filters = _build_vf(
+            scale_mode,
+            fade and index == 0,
+            round(fade_out_start - offset, 3) if fade and index == chunks - 1 else None
+        )
+        
+        plan.append((first_frame, [
+            '-ss', str(start_time + offset),
+            '-i', video_path,
+            '-vf', vf_filters,
+            '-r', str(fps),
+            '-frames:v', str(chunk_frames),
+        ]))
+    
+    return frame_count, plan
+
+
+@functools.lru_cache(maxsize=None)
+def _detect_hw_jpeg_encoder(ffmpeg_cmd: str) -> Optional[str]:
+    """
+    Проверяет (один раз за запуск), работает ли аппаратный JPEG кодер.
+    
+    Список `ffmpeg -encoders` показывает только то, что собрано в ffmpeg,
+    а не то, что поддерживает видеокарта. Поэтому каждый кодер проверяется
+    пробным кодированием одного кадра итогового размера. Декодер и фильтры
+    реального видео проба не проверяет - на этот случай экспорт сам
+    повторяет упавшие части на CPU.
+    
+    Args:
+        ffmpeg_cmd: Путь к ffmpeg
+        
+    Returns:
+        Имя кодера (mjpeg_qsv) или None, если доступен только CPU
+    """
+    if not USE_HW_ENCODER:
+        return None
+    
+    for encoder in HW_JPEG_ENCODERS:
+        try:
+            result = subprocess.run(
+                [
+                    ffmpeg_cmd, '-hide_banner', '-v', 'error',
+                    '-f', 'lavfi', '-i', f'color=s={VIDEO_WIDTH}x{VIDEO_HEIGHT}',
+                    '-frames:v', '1',
+                    '-c:v', encoder,
+                    '-f', 'null', '-'
+                ],
+                capture_output=True, timeout=30
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return encoder
+    return None
+
+
+def _codec_args(encoder: Optional[str], threads: int = 0) -> tuple[list[str], list[str]]:
+    """
+    Формирует аргументы ffmpeg для выбранного JPEG кодера.
+    
+    Args:
+        encoder: Аппаратный кодер или None для CPU (mjpeg)
+        threads: Потоков на процесс ffmpeg (0 = по числу ядер)
+        
+    Returns:
+        Кортеж (аргументы до -i, аргументы кодера)
+    """
+    # Ограничиваем потоки декодера, фильтров и кодера, чтобы параллельные
+    # процессы вместе не запускали больше потоков, чем есть ядер
+    thread_args = ['-threads', str(threads)]
+    input_args = ['-filter_threads', str(threads), *thread_args]
+    if encoder == 'mjpeg_qsv':
+        return ['-hwaccel', 'auto', *input_args], ['-c:v', encoder, '-global_quality', str(JPEG_QSV_QUALITY)]
+    return input_args, ['-c:v', 'mjpeg', '-q:v', str(JPEG_QUALITY), *thread_args]
 
 
 def export_video(
@@ -121,70 +308,79 @@ def export_video(
     create_boot_config(output_dir, fps)
     
     # Очищаем папку от старых кадров
-    for file in os.listdir(output_dir):
-        if file.startswith('pic_') and file.endswith('.jpg'):
-            os.remove(os.path.join(output_dir, file))
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith('pic_') and entry.name.endswith('.jpg'):
+                os.unlink(entry.path)
     
-    # Получаем длительность видео если end_time не указан
-    if end_time is None:
-        try:
-            end_time = get_video_duration(video_path, ffmpeg_cmd)
-        except RuntimeError as e:
-            logger.error(str(e))
-            return False
+    cpu_count = os.cpu_count() or 1
+    try:
+        _, plan = _prepare_export(
+            video_path, ffmpeg_cmd, start_time, end_time, fps, fade, scale_mode,
+            chunks=EXPORT_WORKERS or min(cpu_count, EXPORT_MAX_WORKERS)
+        )
+    except RuntimeError as e:
+        logger.error(str(e))
+        return False
     
-    duration = end_time - start_time
-    # Вычитаем небольшой буфер (1 кадр) чтобы избежать чёрного кадра в конце
-    frame_count = int(duration * fps) - 1
+    output_pattern = os.path.join(output_dir, FRAME_PATTERN)
     
-    logger.info(f"Видео: {os.path.basename(video_path)}")
-    logger.info(f"Экспорт: {start_time:.2f}s - {end_time:.2f}s ({duration:.2f}s)")
-    logger.info(f"Кадров: {frame_count} ({fps} fps)")
-    logger.info(f"Fade: {'Включен' if fade else 'Выключен'}")
+    encoder = _detect_hw_jpeg_encoder(ffmpeg_cmd)
+    # Одному процессу отдаем все ядра, нескольким - поровну
+    threads = max(1, cpu_count // len(plan)) if len(plan) > 1 else 0
     
-    # Формируем команду ffmpeg
-    output_pattern = os.path.join(output_dir, 'pic_%03d.jpg')
-    
-    # Базовые фильтры: масштаб и поворот на 90° до 480x800
-    if scale_mode == 'crop':
-        # Обрезка с сохранением пропорций (заполняет весь кадр)
-        vf_filters = f'scale={VIDEO_HEIGHT}:{VIDEO_WIDTH}:force_original_aspect_ratio=increase,crop={VIDEO_HEIGHT}:{VIDEO_WIDTH},transpose=1'
-    else:
-        # Растяжение без сохранения пропорций (по умолчанию)
-        vf_filters = f'scale={VIDEO_HEIGHT}:{VIDEO_WIDTH},transpose=1'
+    def build_cmds(encoder: Optional[str], parts: list[tuple[int, list[str]]]) -> list[list[str]]:
+        # Формируем команды ffmpeg: по одной на каждую часть
+        hwaccel_args, codec_args = _codec_args(encoder, threads)
+        return [
+            [
+                ffmpeg_cmd,
+                '-v', 'error',
+                *hwaccel_args,
+                *input_args,
+                *codec_args,
+                '-start_number', str(first_frame),
+                output_pattern,
+                '-y'
+            ]
+            for first_frame, input_args in parts
+        ]
     
-    # Добавляем fade эффекты
-    if fade:
-        fade_out_start = duration - FADE_DURATION - (2.0 / fps)
-        vf_filters += f',fade=t=in:st=0:d={FADE_DURATION},fade=t=out:st={fade_out_start:.3f}:d={FADE_DURATION}'
-    
-    cmd = [
-        ffmpeg_cmd,
-        '-ss', str(start_time),
-        '-i', video_path,
-        '-vf', vf_filters,
-        '-r', str(fps),
-        '-frames:v', str(frame_count),
-        '-q:v', str(JPEG_QUALITY),
-        '-start_number', '0',
-        output_pattern,
-        '-y'
-    ]
-    
-    logger.info(f"\nЗапуск ffmpeg...")
+    def run(cmds: list[list[str]]) -> list[subprocess.CompletedProcess]:
+        # Каждая часть - отдельный процесс ffmpeg, потокам остается только ждать.
+        # Вывод ffmpeg (только ошибки) не декодируется, пока не понадобится
+        with ThreadPoolExecutor(max_workers=len(cmds)) as executor:
+            return list(executor.map(
+                lambda cmd: subprocess.run(cmd, capture_output=True),
+                cmds
+            ))
     
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        logger.info(f"\nЗапуск ffmpeg ({encoder or 'CPU'}, процессов: {len(plan)})...")
+        results = run(build_cmds(encoder, plan))
         
-        if result.returncode == 0:
-            actual_count = len([f for f in os.listdir(output_dir) 
-                              if f.startswith('pic_') and f.endswith('.jpg')])
-            logger.info(f"✓ Успешно экспортировано {actual_count} кадров в {output_dir}")
-            return True
-        else:
+        failed_parts = [part for part, result in zip(plan, results) if result.returncode != 0]
+        if failed_parts and encoder:
+            # Пробный кадр не проверяет декодер, фильтры и несколько сессий сразу:
+            # упавшие на аппаратном кодере части повторяем на CPU
+            hw_error = next(result for result in results if result.returncode != 0).stderr
+            logger.warning(
+                f"⚠ Ошибка кодера {encoder} в {len(failed_parts)} из {len(plan)} частей "
+                f"({' '.join(hw_error[:200].decode('utf-8', errors='replace').split())}), повтор на CPU"
+            )
+            results = run(build_cmds(None, failed_parts))
+        
+        failed = [result for result in results if result.returncode != 0]
+        if failed:
             logger.error(f"✗ Ошибка ffmpeg:")
-            logger.error(result.stderr[:500])
+            logger.error(failed[0].stderr[:500].decode('utf-8', errors='replace'))
             return False
+        
+        with os.scandir(output_dir) as entries:
+            actual_count = sum(1 for entry in entries
+                               if entry.name.startswith('pic_') and entry.name.endswith('.jpg'))
+        logger.info(f"✓ Успешно экспортировано {actual_count} кадров в {output_dir}")
+        return True
             
     except FileNotFoundError:
         logger.error("✗ Ошибка: ffmpeg не найден. Установите ffmpeg и добавьте в PATH")
@@ -192,3 +388,123 @@ def export_video(
     except Exception as e:
         logger.error(f"✗ Ошибка: {e}")
         return False
+
+
+def stream_video_frames(
+    video_path: str,
+    ffmpeg_cmd: str,
+    start_time: float = 0,
+    end_time: Optional[float] = None,
+    fps: int = 12,
+    fade: bool = False,
+    scale_mode: str = 'stretch'
+) -> tuple[int, Iterator[bytes]]:
+    """
+    Экспортирует видео в раскадровку потоком JPEG кадров, без записи на диск.
+    
+    Проверка файла и расчет диапазона выполняются сразу при вызове,
+    ffmpeg запускается при запросе первого кадра. FFmpeg пишет кадры
+    в stdout (image2pipe), поток делится на кадры по маркеру конца JPEG (FF D9).
+    
+    Args:
+        video_path: Путь к видео файлу
+        ffmpeg_cmd: Путь к ffmpeg
+        start_time: Время начала в секундах
+        end_time: Время конца в секундах (None = до конца видео)
+        fps: Кадров в секунду для экспорта
+        fade: Добавить fade in/out эффекты
+        scale_mode: Режим масштабирования ('stretch' или 'crop')
+        
+    Returns:
+        Кортеж (ожидаемое количество кадров, итератор с содержимым JPEG кадров)
+        
+    Raises:
+        RuntimeError: Если файл не найден или не удалось определить длительность
+            (ошибки ffmpeg возникают при чтении итератора)
+    """
+    if not os.path.exists(video_path):
+        raise RuntimeError(f"Файл не найден: {video_path}")
+    
+    frame_count, [(_, input_args)] = _prepare_export(video_path, ffmpeg_cmd, start_time, end_time, fps, fade, scale_mode)
+    
+    return frame_count, _stream_frames(ffmpeg_cmd, input_args)
+
+
+def _stream_frames(ffmpeg_cmd: str, input_args: list[str]) -> Iterator[bytes]:
+    """
+    Запускает экспорт в pipe, при сбое аппаратного кодера до первого кадра - повторяет на CPU.
+    
+    Args:
+        ffmpeg_cmd: Путь к ffmpeg
+        input_args: Аргументы ffmpeg из _prepare_export
+        
+    Yields:
+        Содержимое очередного JPEG кадра
+        
+    Raises:
+        RuntimeError: Если ffmpeg завершился с ошибкой
+    """
+    encoder = _detect_hw_jpeg_encoder(ffmpeg_cmd)
+    for attempt_encoder in ([encoder, None] if encoder else [None]):
+        hwaccel_args, codec_args = _codec_args(attempt_encoder)
+        cmd = [
+            ffmpeg_cmd,
+            '-v', 'error',
+            *hwaccel_args,
+            *input_args,
+            *codec_args,
+            '-f', 'image2pipe',
+            'pipe:1'
+        ]
+        
+        logger.info(f"\nЗапуск ffmpeg ({attempt_encoder or 'CPU'})...")
+        
+        frames_sent = False
+        try:
+            for frame in _pipe_frames(cmd):
+                frames_sent = True
+                yield frame
+            return
+        except RuntimeError as e:
+            # Кадры уже ушли на принтер - повторять нельзя
+            if not attempt_encoder or frames_sent:
+                raise
+            logger.warning(f"⚠ Ошибка кодера {attempt_encoder} ({' '.join(str(e).split())}), повтор на CPU")
+
+
+def _pipe_frames(cmd: list[str]) -> Iterator[bytes]:
+    """
+    Запускает ffmpeg с выводом в stdout и делит поток на JPEG кадры.
+    
+    Args:
+        cmd: Команда ffmpeg с выводом в pipe:1
+        
+    Yields:
+        Содержимое очередного JPEG кадра
+        
+    Raises:
+        RuntimeError: Если ffmpeg завершился с ошибкой
+    """
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        buffer = bytearray()
+        search_from = 0
+        while chunk := process.stdout.read1(COPY_BUFFER_SIZE): # pyright: ignore[reportOptionalMemberAccess]
+            buffer += chunk
+            while (end := buffer.find(JPEG_EOI, search_from)) != -1:
+                end += len(JPEG_EOI)
+                yield bytes(buffer[:end])
+                del buffer[:end]
+                search_from = 0
+            # Маркер может оказаться разрезан между блоками
+            search_from = max(0, len(buffer) - 1)
+        
+        stderr = process.stderr.read() # pyright: ignore[reportOptionalMemberAccess]
+        if process.wait() != 0:
+            raise RuntimeError(f"Ошибка ffmpeg:\n{stderr[:500].decode('utf-8', errors='replace')}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close() # pyright: ignore[reportOptionalMemberAccess]
+        process.stderr.close() # pyright: ignore[reportOptionalMemberAccess]